@@ -0,0 +1,70 @@
+import numpy as np
+from typing import Dict, List
+from config import (STARTING_CASH, AGENT_TYPES, AGENT_TRADE_PROBABILITY, AGENT_MAX_ORDER,
+                    AGENT_NOISE_STD, AGENT_EMA_WEIGHT)
+
+class AgentPopulation:
+    '''
+    Simulated traders for one exchange, stored column-wise so a whole tick of
+    decisions and fills is a handful of array operations rather than a loop.
+    '''
+    def __init__(self, stocks: List[str]):
+        self.stocks = list(stocks)
+        self.rng = np.random.default_rng()
+        self.kind = np.empty(0, dtype=np.int8)
+        self.aggression = np.empty(0)
+        self.cash = np.empty(0)
+        self.holdings = np.empty((0, len(self.stocks)), dtype=np.int64)
+        self.last_prices = None
+        self.ema = None
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def add(self, counts: Dict[str, int]):
+        kinds = np.repeat(np.arange(len(AGENT_TYPES), dtype=np.int8), [int(counts.get(kind, 0)) for kind in AGENT_TYPES])
+        self.kind = np.concatenate([self.kind, kinds])
+        self.aggression = np.concatenate([self.aggression, self.rng.uniform(0.5, 1.5, len(kinds))])
+        self.cash = np.concatenate([self.cash, np.full(len(kinds), float(STARTING_CASH))])
+        self.holdings = np.concatenate([self.holdings, np.zeros((len(kinds), len(self.stocks)), dtype=np.int64)])
+
+    def summary(self) -> Dict[str, int]:
+        return {kind: int(count) for kind, count in zip(AGENT_TYPES, np.bincount(self.kind, minlength=len(AGENT_TYPES)))}
+
+    def step(self, prices: np.ndarray) -> Dict[str, float]:
+        '''
+        Trades every agent once at the given prices and returns the net order
+        pressure per stock, scaled to [-1, 1].
+        '''
+        if self.last_prices is None:
+            self.last_prices = prices.copy()
+            self.ema = prices.copy()
+
+        momentum = (prices - self.last_prices) / self.last_prices
+        reversion = (self.ema - prices) / self.ema
+        noise = self.rng.normal(0, AGENT_NOISE_STD / AGENT_MAX_ORDER, (len(self), len(self.stocks)))
+
+        signal = np.select(
+            [self.kind[:, None] == AGENT_TYPES.index('momentum'), self.kind[:, None] == AGENT_TYPES.index('mean_reversion')],
+            [momentum[None, :] * 100, reversion[None, :] * 100],
+            default=0.0
+        ) + noise
+        quantity = np.rint(signal * self.aggression[:, None] * AGENT_MAX_ORDER).astype(np.int64)
+        quantity = np.clip(quantity, -AGENT_MAX_ORDER, AGENT_MAX_ORDER)
+        quantity[self.rng.random(quantity.shape) >= AGENT_TRADE_PROBABILITY] = 0
+
+        # same rules as a client order: sells need the shares, buys need the cash
+        quantity = np.maximum(quantity, -self.holdings)
+        buys = np.maximum(quantity, 0)
+        cost = buys @ prices
+        scale = np.divide(self.cash, cost, out=np.ones_like(cost), where=cost > self.cash)
+        quantity = np.where(quantity > 0, np.floor(buys * scale[:, None]).astype(np.int64), quantity)
+
+        self.cash -= quantity @ prices
+        self.holdings += quantity
+
+        self.last_prices = prices.copy()
+        self.ema += AGENT_EMA_WEIGHT * (prices - self.ema)
+
+        pressure = quantity.sum(axis=0) / (len(self) * AGENT_MAX_ORDER)
+        return dict(zip(self.stocks, pressure.tolist()))
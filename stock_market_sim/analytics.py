@@ -0,0 +1,48 @@
+import math
+from typing import Dict
+
+class UserAnalytics:
+    '''
+    Running risk and performance statistics for one user's portfolio value,
+    updated once per tick in constant memory.
+    '''
+    def __init__(self, starting_value: float):
+        self.starting_value = starting_value
+        self.last_value = starting_value
+        self.peak = starting_value
+        self.max_drawdown = 0.0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside_sq = 0.0
+
+    def update(self, value: float):
+        if self.last_value > 0:
+            # Welford's online mean/variance of per-tick returns
+            tick_return = value / self.last_value - 1
+            self.count += 1
+            delta = tick_return - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (tick_return - self.mean)
+            if tick_return < 0:
+                self.downside_sq += tick_return ** 2
+        self.last_value = value
+
+        self.peak = max(self.peak, value)
+        if self.peak > 0:
+            self.max_drawdown = max(self.max_drawdown, (self.peak - value) / self.peak)
+
+    def summary(self) -> Dict[str, float]:
+        volatility = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+        downside = math.sqrt(self.downside_sq / self.count) if self.count > 0 else 0.0
+        return {
+            'value': self.last_value,
+            'pnl': self.last_value - self.starting_value,
+            'return': self.last_value / self.starting_value - 1 if self.starting_value else 0.0,
+            'mean_return': self.mean,
+            'volatility': volatility,
+            'max_drawdown': self.max_drawdown,
+            'sharpe': self.mean / volatility if volatility > 0 else 0.0,
+            'sortino': self.mean / downside if downside > 0 else 0.0,
+            'ticks': self.count
+        }
@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+import requests
+from price_board import PriceBoard
+
+'''
+Measures price reads per second as read worker processes are added, while a
+writer republishes the board far faster than the real tick rate. Each step
+starts that many price_worker.py servers on real ports and drives them over
+HTTP, and separately times direct board reads from the same number of
+processes.
+    python benchmark_price_board.py --workers 4 --seconds 3
+'''
+STOCKS = ['AAPL', 'GOOG', 'MSFT', 'AMZN', 'TSLA']
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_worker.py')
+
+def read_board(exchange_id: str, seconds: float, start, results):
+    from price_board import PriceBoardReader
+    reader = PriceBoardReader(exchange_id)
+    start.wait()
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        reader.read()
+        count += 1
+    results.put(count)
+
+def read_http(url: str, seconds: float, start, results):
+    session = requests.Session()
+    start.wait()
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        session.get(url).raise_for_status()
+        count += 1
+    results.put(count)
+
+def run_readers(target, argument_lists, seconds: float) -> float:
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=target, args=(*arguments, seconds, start, results)) for arguments in argument_lists]
+    for process in processes:
+        process.start()
+    time.sleep(1)
+    start.set()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / seconds
+
+def start_workers(count: int, base_port: int, exchange_id: str) -> list:
+    workers = [subprocess.Popen([sys.executable, WORKER, '--port', str(base_port + i)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+               for i in range(count)]
+    for i in range(count):
+        url = f'http://127.0.0.1:{base_port + i}/host/{exchange_id}/prices'
+        for _ in range(100):
+            try:
+                requests.get(url).raise_for_status()
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f'price worker on port {base_port + i} did not start')
+    return workers
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--clients', type=int, default=2, help='HTTP client processes per worker.')
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--port', type=int, default=5101)
+    args = parser.parse_args()
+
+    exchange_id = f'BENCH{os.getpid()}'
+    board = PriceBoard(exchange_id, STOCKS)
+    stocks = {stock: 100.0 for stock in STOCKS}
+    stop = threading.Event()
+
+    def write():
+        tick = 0
+        while not stop.is_set():
+            tick += 1
+            for stock in stocks:
+                stocks[stock] += 0.01
+            board.publish(stocks, tick)
+            time.sleep(0.001)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        print(f'{"workers":>8} {"board reads/s":>15} {"http requests/s":>16}')
+        for count in range(1, args.workers + 1):
+            board_rate = run_readers(read_board, [(exchange_id,)] * count, args.seconds)
+            workers = start_workers(count, args.port, exchange_id)
+            try:
+                urls = [(f'http://127.0.0.1:{args.port + i}/host/{exchange_id}/prices',)
+                        for i in range(count) for _ in range(args.clients)]
+                http_rate = run_readers(read_http, urls, args.seconds)
+            finally:
+                for worker in workers:
+                    worker.terminate()
+                    worker.wait()
+            print(f'{count:>8} {board_rate:>15,.0f} {http_rate:>16,.0f}')
+    finally:
+        stop.set()
+        writer.join()
+        board.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+import os
+
 '''
 GLOBAL VARS
 '''
@@ -36,3 +38,25 @@ DIFFICULTY_MAP = {
 }
 STARTING_PRICE_RANGE = range(50, 150)
 STARTING_CASH = 10000
+
+AGENT_TYPES = ('momentum', 'mean_reversion', 'noise')
+AGENT_TRADE_PROBABILITY = 0.2
+AGENT_MAX_ORDER = 10
+AGENT_MAX_POPULATION = 50000
+AGENT_NOISE_STD = 1
+AGENT_EMA_WEIGHT = 0.1
+ORDER_FLOW_IMPACT = 0.02
+ORDER_MODES = ('immediate', 'batch')
+ORDER_RESULT_TICKS = 300
+
+ADMIN_TOKEN = os.environ.get('BATTLESTOCKS_ADMIN_TOKEN')
+SLOW_TICK_THRESHOLD = 0.25
+SLOW_REQUEST_THRESHOLD = 0.5
+SLOW_LOG_SIZE = 100
+WATCHDOG_INTERVAL = 0.05
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_MAX_SECONDS = 300
+PROFILE_RESULT_TTL = 600
+PROFILE_MODES = ('cprofile', 'sampling')
+
+SHARED_PRICE_BOARD = True
\ No newline at end of file
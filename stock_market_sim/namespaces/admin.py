@@ -0,0 +1,109 @@
+from flask import request, jsonify, Response, current_app
+from flask_restx import Namespace, Resource, fields
+import hmac
+import profiling
+from config import exchanges, ADMIN_TOKEN, PROFILE_MAX_SECONDS, PROFILE_MODES
+
+api = Namespace('admin', description='Admin only diagnostics, authorised with the X-Admin-Token header')
+
+def unauthorised():
+    if ADMIN_TOKEN is None or not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), ADMIN_TOKEN.encode()):
+        response = jsonify({'message': 'Admin token required.'})
+        response.status_code = 403
+        return response
+    return None
+
+@api.route('/profile')
+@api.expect(api.model('ProfileBody', {
+    'exchange_id': fields.String(description='Exchange whose tick loop to profile.'),
+    'route': fields.String(description='Route rule to profile instead, e.g. /client/<string:exchange_id>/order.'),
+    'mode': fields.String(required=True, description='cprofile (download as pstats) or sampling (download as collapsed stacks).'),
+    'seconds': fields.Float(required=True, description='How long the session runs.'),
+}))
+@api.response(200, 'Success', model=api.model('ProfileResponse', {
+    'session_id': fields.String(description='Identifier to download the result with.'),
+    'message': fields.String(description='Description of the action taken.')
+}))
+@api.response(400, 'Validation Error', model=api.model('ErrorResponse', {
+    'message': fields.String(description='Error message.')
+}))
+class Profile(Resource):
+    def post(self):
+        error = unauthorised()
+        if error is not None:
+            return error
+
+        body = request.json
+        if body.get('mode') not in PROFILE_MODES:
+            response = jsonify({'message': f'Mode must be one of {", ".join(PROFILE_MODES)}.'})
+            response.status_code = 400
+            return response
+
+        seconds = body.get('seconds')
+        if not isinstance(seconds, (int, float)) or not 0 < seconds <= PROFILE_MAX_SECONDS:
+            response = jsonify({'message': f'Seconds must be between 0 and {PROFILE_MAX_SECONDS}.'})
+            response.status_code = 400
+            return response
+
+        if 'exchange_id' in body:
+            if body['exchange_id'] not in exchanges:
+                response = jsonify({'message': 'Exchange not found.'})
+                response.status_code = 400
+                return response
+            target = f'tick:{body["exchange_id"]}'
+        elif any(rule.rule == body.get('route') for rule in current_app.url_map.iter_rules()):
+            target = f'route:{body["route"]}'
+        else:
+            response = jsonify({'message': 'Profile target must be an exchange_id or a known route.'})
+            response.status_code = 400
+            return response
+
+        session = profiling.start_session(target, body['mode'], seconds)
+        response = jsonify({'session_id': session.id, 'message': f'Profiling {target} for {seconds} seconds.'})
+        response.status_code = 200
+        return response
+
+@api.route('/profile/<string:session_id>')
+@api.response(400, 'Validation Error', model=api.model('ErrorResponse', {
+    'message': fields.String(description='Error message.')
+}))
+class ProfileResult(Resource):
+    def get(self, session_id):
+        error = unauthorised()
+        if error is not None:
+            return error
+
+        if session_id not in profiling.sessions:
+            response = jsonify({'message': 'Profiling session not found.'})
+            response.status_code = 400
+            return response
+
+        session = profiling.sessions[session_id]
+        if session.running:
+            response = jsonify({'message': 'Profiling session still running.'})
+            response.status_code = 400
+            return response
+
+        # results are handed out once, unfetched ones are pruned after PROFILE_RESULT_TTL
+        profiling.sessions.pop(session_id, None)
+
+        if session.mode == 'cprofile':
+            mimetype, extension = 'application/octet-stream', 'pstats'
+        else:
+            mimetype, extension = 'text/plain', 'collapsed'
+        return Response(session.output(), status=200, mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={session_id}.{extension}'})
+
+@api.route('/slow-log')
+@api.response(200, 'Success', model=api.model('SlowLogResponse', {
+    'entries': fields.Raw(description='Recent ticks and requests that exceeded their time threshold, with a stack captured while they ran.')
+}))
+class SlowLog(Resource):
+    def get(self):
+        error = unauthorised()
+        if error is not None:
+            return error
+
+        response = jsonify({'entries': list(profiling.slow_log)})
+        response.status_code = 200
+        return response
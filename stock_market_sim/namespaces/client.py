@@ -1,7 +1,9 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response
 from flask_restx import Namespace, Resource, fields
 import uuid
+import json
 from config import exchanges, trade_requests, STARTING_CASH
+from analytics import UserAnalytics
 
 api = Namespace('client', description='Client related operations')
 
@@ -26,12 +28,14 @@ class Connect(Resource):
             response.status_code = 400
             return response
         
-        if userId in exchanges[exchange_id]['users']:
-            response = jsonify({'message': 'Username taken.'})
-            response.status_code = 400
-            return response
-        
-        exchanges[exchange_id]['users'].update({userId: {'cash': STARTING_CASH, 'assets': {}, 'value': STARTING_CASH}})
+        with exchanges[exchange_id]['lock']:
+            if userId in exchanges[exchange_id]['users']:
+                response = jsonify({'message': 'Username taken.'})
+                response.status_code = 400
+                return response
+
+            exchanges[exchange_id]['analytics'][userId] = UserAnalytics(STARTING_CASH)
+            exchanges[exchange_id]['users'].update({userId: {'cash': STARTING_CASH, 'assets': {}, 'value': STARTING_CASH}})
 
         response = jsonify({'message': f"User {userId} connected to exchange {exchange_id}."})
         response.status_code = 200
@@ -45,7 +49,8 @@ class Connect(Resource):
     'type': fields.String
 }))
 @api.response(200, 'Success', model=api.model('OrderResponse', {
-    'message': fields.String(description='Description of the action taken.')
+    'message': fields.String(description='Description of the action taken.'),
+    'order_id': fields.String(description='Identifier to fetch the fill with, for exchanges in batch order mode.')
 }))
 @api.response(400, 'Validation Error', model=api.model('ErrorResponse', {
     'message': fields.String(description='Error message.')
@@ -63,6 +68,9 @@ class Orders(Resource):
             response.status_code = 400
             return response
 
+        if exchanges[exchange_id]['settings'].get('order_mode') == 'batch':
+            return self.enqueue(exchange_id, order_data)
+
         with exchanges[exchange_id]['lock']:
             if not exchanges[exchange_id]['STARTED']:
                 response = jsonify({'message': 'Market simulation not started.'})
@@ -97,6 +105,107 @@ class Orders(Resource):
         response.status_code = 200
         return response
 
+    def enqueue(self, exchange_id, order_data):
+        # batch mode never takes the exchange lock; the tick loop validates funds when it clears the queue
+        exchange = exchanges[exchange_id]
+
+        if not exchange['STARTED']:
+            response = jsonify({'message': 'Market simulation not started.'})
+            response.status_code = 400
+            return response
+
+        if order_data['userId'] not in exchange['users']:
+            response = jsonify({'message': 'User not found.'})
+            response.status_code = 400
+            return response
+
+        quantity = order_data['quantity']
+        if order_data['stock'] not in exchange['stocks'] or order_data['type'] not in ('buy', 'sell') or isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+            response = jsonify({'message': 'Invalid order.'})
+            response.status_code = 400
+            return response
+
+        order_id = str(uuid.uuid4())
+        order = {key: order_data[key] for key in ('userId', 'stock', 'quantity', 'type')}
+        exchange['order_results'][order_id] = {**order, 'status': 'pending'}
+        exchange['order_queue'].put((order_id, order))
+
+        response = jsonify({'message': 'Order queued for the next tick.', 'order_id': order_id})
+        response.status_code = 200
+        return response
+
+@api.route('/<string:exchange_id>/order/<string:order_id>', methods=['GET'])
+@api.response(200, 'Success', model=api.model('OrderStatusResponse', {
+    'order': fields.Raw(description='The queued order with its status (pending, filled or rejected) and fill price. Cleared orders can be fetched once.')
+}))
+@api.response(400, 'Validation Error', model=api.model('ErrorResponse', {
+    'message': fields.String(description='Error message.')
+}))
+class OrderStatus(Resource):
+    def get(self, exchange_id, order_id):
+        global exchanges
+
+        exchange_id = str(exchange_id)
+        order_id = str(order_id)
+
+        if exchange_id not in exchanges:
+            response = jsonify({'message': 'Exchange not found.'})
+            response.status_code = 400
+            return response
+
+        order = exchanges[exchange_id]['order_results'].get(order_id)
+        if order is None:
+            response = jsonify({'message': 'Order not found.'})
+            response.status_code = 400
+            return response
+
+        # a cleared order is only reported once, pending ones stay until the next tick clears them
+        if order['status'] != 'pending':
+            exchanges[exchange_id]['order_results'].pop(order_id, None)
+
+        response = jsonify({'order': order})
+        response.status_code = 200
+        return response
+
+@api.route('/<string:exchange_id>/view/<string:user_id>', methods=['GET'])
+@api.response(200, 'Success', model=api.model('ViewResponse', {
+    'account': fields.Raw(description='Cash, assets and value of the user.'),
+    'prices': fields.Raw(description='Current prices of stocks.'),
+    'tick': fields.Integer(description='Tick the prices were published at.')
+}))
+@api.response(400, 'Validation Error', model=api.model('ErrorResponse', {
+    'message': fields.String(description='Error message.')
+}))
+class View(Resource):
+    def get(self, exchange_id, user_id):
+        global exchanges
+
+        exchange_id = str(exchange_id)
+        user_id = str(user_id)
+
+        if exchange_id not in exchanges:
+            response = jsonify({'message': 'Exchange not found.'})
+            response.status_code = 400
+            return response
+
+        with exchanges[exchange_id]['lock']:
+            if not exchanges[exchange_id]['STARTED']:
+                response = jsonify({'message': 'Market simulation not started.'})
+                response.status_code = 400
+                return response
+
+            if user_id not in exchanges[exchange_id]['users']:
+                response = jsonify({'message': 'User not found.'})
+                response.status_code = 400
+                return response
+
+            account = json.dumps(exchanges[exchange_id]['users'][user_id], separators=(',', ':'))
+            prices = exchanges[exchange_id]['prices_json']
+            tick = exchanges[exchange_id]['tick_count']
+
+        # prices are serialized once per tick, so only this user's account is encoded per request
+        return Response(f'{{"account":{account},"prices":{prices},"tick":{tick}}}', status=200, mimetype='application/json')
+
 @api.route('/<string:exchange_id>/trade-request', methods=['POST'])
 @api.expect(api.model('TradeRequest', {
     'from_user': fields.String(required=True, description='User ID of the sender.'),
@@ -4,8 +4,11 @@ import random
 import string
 from collections import deque
 import threading
-from config import exchanges, CODE_LENGTH, DIFFICULTY_MAP, STARTING_PRICE_RANGE
-from simulation import start_simulation_thread
+import queue
+from config import exchanges, CODE_LENGTH, DIFFICULTY_MAP, STARTING_PRICE_RANGE, AGENT_TYPES, AGENT_MAX_POPULATION, ORDER_MODES, SHARED_PRICE_BOARD
+from simulation import start_simulation_thread, publish_prices
+from agents import AgentPopulation
+from price_board import PriceBoard
 
 api = Namespace('host', description='Host related operations')
 
@@ -21,6 +24,13 @@ class Init(Resource):
             'stocks': {},
             'news_headlines': deque(),
             'users': {},
+            'agents': None,
+            'analytics': {},
+            'prices_json': '{}',
+            'price_board': None,
+            'order_queue': queue.SimpleQueue(),
+            'order_results': {},
+            'order_expiry': deque(),
             'tick_count': 0,
             'STARTED': False,
             'kill': False,
@@ -34,18 +44,29 @@ class Init(Resource):
 @api.expect(api.model('StartBody', {
     'stocks': fields.List(fields.String, required=True, description='List of stocks to include in the simulation.'),
     'difficulty': fields.Integer(required=True, description='Difficulty level of the simulation (1 to 5 inclusive).'),
+    'order_mode': fields.String(description='How client orders execute: immediate (default) or batch, cleared at each tick.'),
 }))
 class Start(Resource):
     def post(self, exchange_id):
         global exchanges
         config_data = request.json
-        settings = DIFFICULTY_MAP[config_data['difficulty']]
+        order_mode = config_data.get('order_mode', 'immediate')
+        if order_mode not in ORDER_MODES:
+            response = jsonify({'message': f'Order mode must be one of {", ".join(ORDER_MODES)}.'})
+            response.status_code = 400
+            return response
+        settings = {**DIFFICULTY_MAP[config_data['difficulty']], 'order_mode': order_mode}
         stocks = {stock: random.choice(STARTING_PRICE_RANGE) for stock in config_data['stocks']}
         with exchanges[exchange_id]['lock']:
             exchanges[exchange_id]['settings'].update(settings)
             exchanges[exchange_id]['stocks'].update(stocks)
             exchanges[exchange_id]['tick_count'] = 0
             exchanges[exchange_id]['STARTED'] = True
+            if SHARED_PRICE_BOARD:
+                if exchanges[exchange_id]['price_board'] is not None:
+                    exchanges[exchange_id]['price_board'].close()
+                exchanges[exchange_id]['price_board'] = PriceBoard(exchange_id, exchanges[exchange_id]['stocks'])
+            publish_prices(exchanges[exchange_id])
         start_simulation_thread(exchange_id, 60)
         response = jsonify({'exchange_id': exchange_id, 'message': f'Configuration updated and market simulation started for exchange {exchange_id}.'})
         response.status_code = 200
@@ -70,6 +91,20 @@ class MarketData(Resource):
             response.status_code = 200
             return response
 
+@api.route('/<string:exchange_id>/analytics')
+class Analytics(Resource):
+    def get(self, exchange_id):
+        global exchanges
+        if exchange_id not in exchanges:
+            response = jsonify({'message': 'Exchange not found.'})
+            response.status_code = 400
+            return response
+        with exchanges[exchange_id]['lock']:
+            analytics = {userId: stats.summary() for userId, stats in exchanges[exchange_id]['analytics'].items()}
+        response = jsonify({'analytics': analytics})
+        response.status_code = 200
+        return response
+
 @api.route('/<string:exchange_id>/add-news')
 @api.expect(api.model('NewsBody', {
     'stock': fields.String(required=True, description='Stock to affect.'),
@@ -89,6 +124,42 @@ class News(Resource):
         response.status_code = 200
         return response
 
+@api.route('/<string:exchange_id>/add-agents')
+@api.expect(api.model('AgentsBody', {
+    'momentum': fields.Integer(description='Number of momentum traders to add.'),
+    'mean_reversion': fields.Integer(description='Number of mean-reversion traders to add.'),
+    'noise': fields.Integer(description='Number of noise traders to add.'),
+}))
+class Agents(Resource):
+    def post(self, exchange_id):
+        global exchanges
+        if exchange_id not in exchanges:
+            response = jsonify({'message': 'Exchange not found.'})
+            response.status_code = 400
+            return response
+        counts = {kind: request.json.get(kind, 0) for kind in AGENT_TYPES}
+        if any(isinstance(count, bool) or not isinstance(count, int) or count < 0 for count in counts.values()) or sum(counts.values()) == 0:
+            response = jsonify({'message': 'Agent counts must be non-negative integers with at least one agent.'})
+            response.status_code = 400
+            return response
+        with exchanges[exchange_id]['lock']:
+            if not exchanges[exchange_id]['stocks']:
+                response = jsonify({'message': 'Market simulation not started.'})
+                response.status_code = 400
+                return response
+            existing = len(exchanges[exchange_id]['agents']) if exchanges[exchange_id]['agents'] is not None else 0
+            if existing + sum(counts.values()) > AGENT_MAX_POPULATION:
+                response = jsonify({'message': f'An exchange can have at most {AGENT_MAX_POPULATION} agents.'})
+                response.status_code = 400
+                return response
+            if exchanges[exchange_id]['agents'] is None:
+                exchanges[exchange_id]['agents'] = AgentPopulation(exchanges[exchange_id]['stocks'])
+            exchanges[exchange_id]['agents'].add(counts)
+            summary = exchanges[exchange_id]['agents'].summary()
+        response = jsonify({'agents': summary, 'message': f'Added {sum(counts.values())} agents to exchange {exchange_id}.'})
+        response.status_code = 200
+        return response
+
 @api.route('/<string:exchange_id>/pause')
 class Pause(Resource):
     def get(self, exchange_id):
@@ -0,0 +1,136 @@
+import json
+import os
+import sys
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, List, Tuple
+
+# header is five uint64 slots followed by the JSON stock names (padded to 8 bytes) and a float64 per stock
+SEQ, TICK, COUNT, NAMES_LENGTH, CLOSED = range(5)
+HEADER_SIZE = 5 * 8
+READ_TIMEOUT = 0.1
+
+def board_name(exchange_id: str) -> str:
+    return f'battlestocks_{exchange_id}'
+
+def padded(length: int) -> int:
+    return (length + 7) // 8 * 8
+
+class PriceBoard:
+    '''
+    Publishes an exchange's prices into shared memory for read workers in other
+    processes. Writes follow a seqlock: the sequence number is odd while the
+    prices are being updated and readers retry until they see the same even
+    number before and after copying.
+    '''
+    def __init__(self, exchange_id: str, stocks: List[str]):
+        self.stocks = list(stocks)
+        names = json.dumps(self.stocks).encode()
+        size = HEADER_SIZE + padded(len(names)) + 8 * len(self.stocks)
+        try:
+            self.shm = shared_memory.SharedMemory(name=board_name(exchange_id), create=True, size=size)
+        except FileExistsError:
+            # left behind by a server that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=board_name(exchange_id))
+            stale.unlink()
+            stale.close()
+            self.shm = shared_memory.SharedMemory(name=board_name(exchange_id), create=True, size=size)
+        self.header = np.ndarray(5, dtype=np.uint64, buffer=self.shm.buf)
+        self.header[:] = 0
+        self.header[COUNT] = len(self.stocks)
+        self.header[NAMES_LENGTH] = len(names)
+        self.shm.buf[HEADER_SIZE:HEADER_SIZE + len(names)] = names
+        self.prices = np.ndarray(len(self.stocks), dtype=np.float64, buffer=self.shm.buf,
+                                 offset=HEADER_SIZE + padded(len(names)))
+
+    def publish(self, stocks: Dict[str, float], tick: int):
+        self.header[SEQ] += 1
+        self.prices[:] = [stocks[stock] for stock in self.stocks]
+        self.header[TICK] = tick
+        self.header[SEQ] += 1
+
+    def close(self):
+        self.header[CLOSED] = 1
+        # the numpy views must go before the mapping can be released
+        del self.header, self.prices
+        self.shm.close()
+        self.shm.unlink()
+
+# set in children forked after this process's tracker was running, which share it with the parent
+forked_tracker = False
+
+def mark_forked_tracker():
+    global forked_tracker
+    forked_tracker = resource_tracker._resource_tracker._fd is not None
+
+os.register_at_fork(after_in_child=mark_forked_tracker)
+
+def tracker_inherited() -> bool:
+    '''
+    Whether this process's resource tracker belongs to a parent process. A
+    tracker this process launched itself records its pid; one handed down by
+    a spawning parent only has the fd, and a forked child is flagged by
+    mark_forked_tracker since it also copies the parent's pid.
+    '''
+    tracker = resource_tracker._resource_tracker
+    return forked_tracker or (tracker._fd is not None and tracker._pid is None)
+
+def attach_untracked(name: str) -> shared_memory.SharedMemory:
+    '''
+    Attaches to an existing segment without letting this process's resource
+    tracker unlink it on exit, which would pull the board out from under the
+    simulation. Python 3.13 supports this directly with track=False. Earlier
+    versions register every attach, so the registration is undone here, which
+    needs CPython internals: SharedMemory._name (the name as registered, with
+    its leading slash) and the tracker state read by tracker_inherited.
+    Unregistering in a tracker shared with a parent would drop the parent's
+    own registration, so that case is left alone; the parent unlinks the
+    board itself.
+    '''
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if not tracker_inherited():
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+class PriceBoardReader:
+    '''
+    Read-only view of a PriceBoard. Raises FileNotFoundError if the exchange
+    has no board.
+    '''
+    def __init__(self, exchange_id: str):
+        self.shm = attach_untracked(board_name(exchange_id))
+        self.header = np.ndarray(5, dtype=np.uint64, buffer=self.shm.buf)
+        names_length = int(self.header[NAMES_LENGTH])
+        self.stocks = json.loads(bytes(self.shm.buf[HEADER_SIZE:HEADER_SIZE + names_length]))
+        self.prices = np.ndarray(len(self.stocks), dtype=np.float64, buffer=self.shm.buf,
+                                 offset=HEADER_SIZE + padded(names_length))
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.header[CLOSED])
+
+    def read(self) -> Tuple[int, Dict[str, float]]:
+        '''
+        Raises TimeoutError if no consistent snapshot appears within
+        READ_TIMEOUT seconds, e.g. because the writer died mid-update.
+        '''
+        deadline = None
+        while True:
+            seq = int(self.header[SEQ])
+            if not seq & 1:
+                prices = self.prices.tolist()
+                tick = int(self.header[TICK])
+                if int(self.header[SEQ]) == seq:
+                    return tick, dict(zip(self.stocks, prices))
+            if deadline is None:
+                deadline = time.monotonic() + READ_TIMEOUT
+            elif time.monotonic() > deadline:
+                raise TimeoutError('Price board is being written or was abandoned mid-update.')
+            time.sleep(0)
+
+    def close(self):
+        del self.header, self.prices
+        self.shm.close()
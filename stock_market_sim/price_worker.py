@@ -0,0 +1,47 @@
+from flask import Flask, jsonify
+import argparse
+from price_board import PriceBoardReader
+
+'''
+Read-only worker that serves prices straight from the simulation's shared
+memory price boards. Run as many as needed next to server.py, e.g.
+    python price_worker.py --port 5001
+'''
+app = Flask(__name__)
+readers = {}
+
+def get_reader(exchange_id: str):
+    reader = readers.get(exchange_id)
+    if reader is not None and reader.closed:
+        reader.close()
+        reader = None
+    if reader is None:
+        try:
+            reader = PriceBoardReader(exchange_id)
+        except FileNotFoundError:
+            readers.pop(exchange_id, None)
+            return None
+        readers[exchange_id] = reader
+    return reader
+
+@app.route('/host/<string:exchange_id>/prices')
+def prices(exchange_id):
+    reader = get_reader(exchange_id)
+    if reader is None or reader.closed:
+        response = jsonify({'message': 'Exchange not found.'})
+        response.status_code = 400
+        return response
+    try:
+        tick, prices = reader.read()
+    except TimeoutError:
+        response = jsonify({'message': 'Prices unavailable.'})
+        response.status_code = 503
+        return response
+    response = jsonify({'prices': prices, 'tick': tick})
+    response.status_code = 200
+    return response
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=5001)
+    app.run(port=parser.parse_args().port, threaded=True)
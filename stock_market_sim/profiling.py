@@ -0,0 +1,164 @@
+import cProfile
+import marshal
+import pstats
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List
+from config import (SLOW_TICK_THRESHOLD, SLOW_REQUEST_THRESHOLD, SLOW_LOG_SIZE, WATCHDOG_INTERVAL,
+                    PROFILE_SAMPLE_INTERVAL, PROFILE_RESULT_TTL)
+
+# work currently running, keyed by thread ident: [label, start, slow log entry]
+# labels are 'tick:<exchange_id>' for the simulation loop and 'route:<rule>' for requests
+in_flight: Dict[int, list] = {}
+sessions: Dict[str, 'ProfileSession'] = {}
+targets: Dict[str, List['ProfileSession']] = {}
+targets_lock = threading.Lock()
+slow_log = deque(maxlen=SLOW_LOG_SIZE)
+
+class ProfileSession:
+    def __init__(self, target: str, mode: str, seconds: float):
+        self.id = str(uuid.uuid4())
+        self.target = target
+        self.mode = mode
+        self.deadline = time.monotonic() + seconds
+        self.stats = None
+        self.stacks = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    def add_profile(self, profile: cProfile.Profile):
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+
+    def add_sample(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(f'{frame.f_code.co_filename}:{frame.f_code.co_name}:{frame.f_lineno}')
+            frame = frame.f_back
+        with self.lock:
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def output(self) -> bytes:
+        with self.lock:
+            if self.mode == 'cprofile':
+                # the same layout pstats.Stats.dump_stats writes, so pstats.Stats(path) can load it
+                return marshal.dumps(self.stats.stats if self.stats is not None else {})
+            return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.items()).encode()
+
+def start_session(target: str, mode: str, seconds: float) -> ProfileSession:
+    session = ProfileSession(target, mode, seconds)
+    sessions[session.id] = session
+    with targets_lock:
+        targets[target] = targets.get(target, []) + [session]
+    start_watchdog()
+    return session
+
+def prune_sessions():
+    now = time.monotonic()
+    for session_id, session in list(sessions.items()):
+        if now > session.deadline + PROFILE_RESULT_TTL:
+            sessions.pop(session_id, None)
+
+def begin(label: str):
+    in_flight[threading.get_ident()] = [label, time.perf_counter(), None]
+    # a single lookup, the watchdog may drop the target between a membership test and an index
+    label_sessions = targets.get(label)
+    if not label_sessions:
+        return None
+
+    profiling = [session for session in label_sessions if session.mode == 'cprofile' and session.running]
+    if not profiling:
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # another profiler already owns this interpreter (Python 3.12+), skip this call
+        return None
+    return profile, profiling
+
+def end(token):
+    entry = in_flight.pop(threading.get_ident(), None)
+    if entry is not None and entry[2] is not None:
+        entry[2]['duration'] = time.perf_counter() - entry[1]
+    if token is not None:
+        profile, profiling = token
+        profile.disable()
+        for session in profiling:
+            session.add_profile(profile)
+
+@contextmanager
+def track(label: str):
+    token = begin(label)
+    try:
+        yield
+    finally:
+        end(token)
+
+def check_in_flight():
+    now = time.perf_counter()
+    frames = None
+    for ident, entry in list(in_flight.items()):
+        label, start, logged = entry
+        threshold = SLOW_TICK_THRESHOLD if label.startswith('tick:') else SLOW_REQUEST_THRESHOLD
+        if logged is not None or now - start < threshold:
+            continue
+        frames = frames if frames is not None else sys._current_frames()
+        if ident not in frames:
+            continue
+        entry[2] = {
+            'label': label,
+            'time': time.time(),
+            'elapsed': now - start,
+            'duration': None,
+            'stack': traceback.format_stack(frames[ident])
+        }
+        slow_log.append(entry[2])
+
+def sample_targets() -> bool:
+    sampling = False
+    frames = None
+    for target, target_sessions in list(targets.items()):
+        target_sessions = [session for session in target_sessions if session.running]
+        if not target_sessions:
+            with targets_lock:
+                if not any(session.running for session in targets.get(target, [])):
+                    targets.pop(target, None)
+            continue
+        samplers = [session for session in target_sessions if session.mode == 'sampling']
+        if not samplers:
+            continue
+        sampling = True
+        frames = frames if frames is not None else sys._current_frames()
+        for ident, entry in list(in_flight.items()):
+            if entry[0] == target and ident in frames:
+                for session in samplers:
+                    session.add_sample(frames[ident])
+    return sampling
+
+def watch():
+    while True:
+        check_in_flight()
+        prune_sessions()
+        time.sleep(PROFILE_SAMPLE_INTERVAL if sample_targets() else WATCHDOG_INTERVAL)
+
+watchdog = None
+watchdog_lock = threading.Lock()
+
+def start_watchdog():
+    global watchdog
+    with watchdog_lock:
+        if watchdog is None:
+            watchdog = threading.Thread(target=watch, daemon=True)
+            watchdog.start()
@@ -1,13 +1,26 @@
-from flask import Flask
+from flask import Flask, request, g
 from flask_restx import Api
+import profiling
 from namespaces.host import api as host_ns
 from namespaces.client import api as client_ns
+from namespaces.admin import api as admin_ns
 
 app = Flask(__name__)
 api = Api(app)
 
 api.add_namespace(host_ns, path='/host')
 api.add_namespace(client_ns, path='/client')
+api.add_namespace(admin_ns, path='/admin')
+
+@app.before_request
+def track_request():
+    g.profile = profiling.begin(f'route:{request.url_rule.rule if request.url_rule else request.path}')
+
+@app.teardown_request
+def end_request(exception):
+    profiling.end(g.pop('profile', None))
+
+profiling.start_watchdog()
 
 if __name__ == '__main__':
     app.run(debug=True, threaded=True)
\ No newline at end of file
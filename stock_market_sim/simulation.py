@@ -1,8 +1,12 @@
 import threading
 import time
+import json
+import queue
 import random
-from typing import List
-from config import exchanges, SECONDS_PER_TICK, NEWS_IMPACT_DURATION
+import numpy as np
+from typing import Dict, List
+import profiling
+from config import exchanges, SECONDS_PER_TICK, NEWS_IMPACT_DURATION, ORDER_FLOW_IMPACT, ORDER_RESULT_TICKS
 
 class DecayEffect:
     def __init__(self, stock: str, total_impact: float, duration: int, sentiment: str):
@@ -19,6 +23,48 @@ class DecayEffect:
         else:
             return stock_price / (1 + per_tick_impact)
 
+def apply_order_flow(stocks: Dict[str, float], pressure: Dict[str, float]):
+    for stock, amount in pressure.items():
+        stocks[stock] *= 1 + ORDER_FLOW_IMPACT * amount
+
+def clear_order_queue(config: dict):
+    orders = []
+    while True:
+        try:
+            orders.append(config['order_queue'].get_nowait())
+        except queue.Empty:
+            break
+
+    tick = config['tick_count']
+    # sells go first so their proceeds can fund buys cleared in the same batch
+    for order_id, order in sorted(orders, key=lambda item: item[1]['type'] != 'sell'):
+        user = config['users'][order['userId']]
+        stock = order['stock']
+        quantity = order['quantity']
+        price = config['stocks'][stock]
+        result = config['order_results'][order_id]
+
+        if order['type'] == 'buy' and user['cash'] >= quantity * price:
+            user['cash'] -= quantity * price
+            user['assets'][stock] = user['assets'].get(stock, 0) + quantity
+            result.update({'status': 'filled', 'price': price, 'tick': tick})
+        elif order['type'] == 'sell' and user['assets'].get(stock, 0) >= quantity:
+            user['cash'] += quantity * price
+            user['assets'][stock] -= quantity
+            result.update({'status': 'filled', 'price': price, 'tick': tick})
+        else:
+            result.update({'status': 'rejected', 'message': 'Order cannot be executed due to insufficient funds or stocks.', 'tick': tick})
+        config['order_expiry'].append((tick, order_id))
+
+    # results are also dropped once fetched, this catches the ones nobody asked for
+    while config['order_expiry'] and config['order_expiry'][0][0] <= tick - ORDER_RESULT_TICKS:
+        config['order_results'].pop(config['order_expiry'].popleft()[1], None)
+
+def publish_prices(config: dict):
+    config['prices_json'] = json.dumps(config['stocks'], separators=(',', ':'))
+    if config['price_board'] is not None:
+        config['price_board'].publish(config['stocks'], config['tick_count'])
+
 def simulate_market(exchange_id: str, timeout: int):
     decay_effects: List[DecayEffect] = []
 
@@ -34,31 +80,43 @@ def simulate_market(exchange_id: str, timeout: int):
 
             config = exchanges[exchange_id]
 
-            if len(decay_effects) == 0:
-                for stock in config['stocks']:
-                    config['stocks'][stock] += random.gauss(0, config['settings']['stock_std'])
+            with profiling.track(f'tick:{exchange_id}'):
+                if len(decay_effects) == 0:
+                    for stock in config['stocks']:
+                        config['stocks'][stock] += random.gauss(0, config['settings']['stock_std'])
             
-            for effect in decay_effects[:]:
-                config['stocks'][effect.stock] = effect.decay(config['stocks'][effect.stock])
-                if effect.remaining_ticks <= 0:
-                    decay_effects.remove(effect)
-
-            if config['news_headlines']:
-                headline = config['news_headlines'].popleft()
-                stock = headline['stock']
-                sentiment = headline['sentiment']
-                impact = random.uniform(config['settings']['headline_min_impact'], config['settings']['headline_max_impact'])
-                decay_effects.append(DecayEffect(stock, impact, NEWS_IMPACT_DURATION, sentiment))
+                for effect in decay_effects[:]:
+                    config['stocks'][effect.stock] = effect.decay(config['stocks'][effect.stock])
+                    if effect.remaining_ticks <= 0:
+                        decay_effects.remove(effect)
+
+                if config['news_headlines']:
+                    headline = config['news_headlines'].popleft()
+                    stock = headline['stock']
+                    sentiment = headline['sentiment']
+                    impact = random.uniform(config['settings']['headline_min_impact'], config['settings']['headline_max_impact'])
+                    decay_effects.append(DecayEffect(stock, impact, NEWS_IMPACT_DURATION, sentiment))
+
+                # queued client orders and agents all trade at this tick's price, only agent flow moves it
+                clear_order_queue(config)
+                agents = config['agents']
+                if agents is not None and len(agents) > 0:
+                    pressure = agents.step(np.array([config['stocks'][stock] for stock in agents.stocks]))
+                    apply_order_flow(config['stocks'], pressure)
             
-            for user_id, user in config['users'].items():
-                user['value'] = user['cash']
-                for stock, quantity in user['assets'].items():
-                    user['value'] += config['stocks'][stock] * quantity
-                config['users'][user_id] = user
+                for user_id, user in config['users'].items():
+                    user['value'] = user['cash']
+                    for stock, quantity in user['assets'].items():
+                        user['value'] += config['stocks'][stock] * quantity
+                    config['users'][user_id] = user
+                    config['analytics'][user_id].update(user['value'])
             
-            exchanges[exchange_id]['tick_count'] += 1
+                exchanges[exchange_id]['tick_count'] += 1
+                publish_prices(config)
             time.sleep(SECONDS_PER_TICK)
         
+    if exchanges[exchange_id]['price_board'] is not None:
+        exchanges[exchange_id]['price_board'].close()
     del exchanges[exchange_id]
 
 def start_simulation_thread(exchange_id: str, timeout: int) -> threading.Thread:
@@ -1,7 +1,19 @@
 import pytest
 import json
 import time
+import marshal
+import subprocess
+import sys
+import queue
+import numpy as np
+from collections import deque
 from server import app
+from config import AGENT_TYPES, AGENT_MAX_POPULATION, ORDER_RESULT_TICKS
+from simulation import clear_order_queue
+from agents import AgentPopulation
+from analytics import UserAnalytics
+from price_board import PriceBoard, PriceBoardReader, SEQ
+from price_worker import app as price_worker_app
 
 @pytest.fixture
 def client():
@@ -35,6 +47,35 @@ def test_market_data(client):
     response = client.get(f'/host/{exchange_id}/market-data')
     assert response.status_code == 200
 
+def test_analytics(client):
+    response = client.get('/host/init-server')
+    exchange_id = json.loads(response.data)['exchange_id']
+
+    client.post(f'/host/{exchange_id}/start-server', json={
+        'stocks': ['AAPL', 'GOOG'],
+        'difficulty': 3
+    })
+    client.post(f'/client/{exchange_id}/connect', json={'name': 'user1'})
+
+    response = client.get(f'/host/{exchange_id}/analytics')
+    assert response.status_code == 200
+    stats = json.loads(response.data)['analytics']['user1']
+    assert stats['pnl'] == 0
+    assert stats['max_drawdown'] == 0
+
+def test_user_analytics():
+    stats = UserAnalytics(100)
+    for value in [110, 99, 121]:
+        stats.update(value)
+    summary = stats.summary()
+
+    returns = [0.1, -0.1, 121 / 99 - 1]
+    mean = sum(returns) / 3
+    assert summary['pnl'] == 21
+    assert abs(summary['mean_return'] - mean) < 1e-12
+    assert abs(summary['volatility'] - (sum((r - mean) ** 2 for r in returns) / 2) ** 0.5) < 1e-12
+    assert abs(summary['max_drawdown'] - 0.1) < 1e-12
+
 def test_add_news(client):
     response = client.get('/host/init-server')
     exchange_id = json.loads(response.data)['exchange_id']
@@ -50,6 +91,62 @@ def test_add_news(client):
     })
     assert response.status_code == 200
 
+def test_add_agents(client):
+    response = client.get('/host/init-server')
+    exchange_id = json.loads(response.data)['exchange_id']
+
+    response = client.post(f'/host/{exchange_id}/add-agents', json={'noise': 10})
+    assert response.status_code == 400
+
+    client.post(f'/host/{exchange_id}/start-server', json={
+        'stocks': ['AAPL', 'GOOG'],
+        'difficulty': 3
+    })
+
+    response = client.post(f'/host/{exchange_id}/add-agents', json={
+        'momentum': 100,
+        'mean_reversion': 100,
+        'noise': 100
+    })
+    assert response.status_code == 200
+    assert json.loads(response.data)['agents'] == {'momentum': 100, 'mean_reversion': 100, 'noise': 100}
+
+    response = client.post(f'/host/{exchange_id}/add-agents', json={'noise': 50})
+    assert json.loads(response.data)['agents']['noise'] == 150
+
+    response = client.post(f'/host/{exchange_id}/add-agents', json={'noise': -1})
+    assert response.status_code == 400
+
+    response = client.post(f'/host/{exchange_id}/add-agents', json={'noise': True})
+    assert response.status_code == 400
+
+    response = client.post(f'/host/{exchange_id}/add-agents', json={'noise': AGENT_MAX_POPULATION})
+    assert response.status_code == 400
+
+def test_agent_step():
+    population = AgentPopulation(['AAPL', 'GOOG'])
+    population.add({'momentum': 200, 'mean_reversion': 200, 'noise': 200})
+    prices = np.array([100.0, 50.0])
+
+    for _ in range(200):
+        pressure = population.step(prices)
+        assert all(-1 <= amount <= 1 for amount in pressure.values())
+        assert (population.cash >= 0).all()
+        assert (population.holdings >= 0).all()
+        prices = prices * np.exp(np.random.normal(0, 0.02, 2))
+
+    momentum = population.kind == AGENT_TYPES.index('momentum')
+    reversion = population.kind == AGENT_TYPES.index('mean_reversion')
+
+    # a sharp rise on top of a settled market: momentum buys it, mean reversion sells it
+    for _ in range(50):
+        population.step(prices)
+    holdings_before = population.holdings.copy()
+    population.step(prices * 1.1)
+    traded = population.holdings - holdings_before
+    assert traded[momentum].sum() > 0
+    assert traded[reversion].sum() < 0
+
 def test_pause_resume_stop(client):
     response = client.get('/host/init-server')
     exchange_id = json.loads(response.data)['exchange_id']
@@ -121,6 +218,111 @@ def test_order(client):
     assert user_data['cash'] < 10000
     assert 'AAPL' in user_data['assets'] and user_data['assets']['AAPL'] == 5
 
+def test_batch_order(client):
+    response = client.get('/host/init-server')
+    exchange_id = json.loads(response.data)['exchange_id']
+
+    client.post(f'/host/{exchange_id}/start-server', json={
+        'stocks': ['AAPL', 'GOOG'],
+        'difficulty': 3,
+        'order_mode': 'batch'
+    })
+
+    client.post(f'/client/{exchange_id}/connect', json={'name': 'user1'})
+
+    response = client.post(f'/client/{exchange_id}/order', json={
+        'userId': 'user1',
+        'stock': 'AAPL',
+        'quantity': 5,
+        'type': 'buy'
+    })
+    assert response.status_code == 200
+    order_id = json.loads(response.data)['order_id']
+
+    response = client.post(f'/client/{exchange_id}/order', json={
+        'userId': 'user1',
+        'stock': 'AAPL',
+        'quantity': 1000,
+        'type': 'sell'
+    })
+    rejected_id = json.loads(response.data)['order_id']
+
+    time.sleep(2)
+
+    order = client.get(f'/client/{exchange_id}/order/{order_id}').json['order']
+    assert order['status'] == 'filled'
+    assert order['price'] > 0
+    assert client.get(f'/client/{exchange_id}/order/{rejected_id}').json['order']['status'] == 'rejected'
+
+    response = client.get(f'/client/{exchange_id}/order/{order_id}')
+    assert response.status_code == 400
+    assert response.json['message'] == 'Order not found.'
+
+    for quantity in ['5', 1.5, True]:
+        response = client.post(f'/client/{exchange_id}/order', json={
+            'userId': 'user1',
+            'stock': 'AAPL',
+            'quantity': quantity,
+            'type': 'buy'
+        })
+        assert response.status_code == 400
+
+    user_data = client.get(f'/host/{exchange_id}/market-data').json['details']['user1']
+    assert user_data['assets']['AAPL'] == 5
+
+def test_clear_order_queue():
+    config = {
+        'stocks': {'AAPL': 100.0},
+        'users': {'user1': {'cash': 100000, 'assets': {}, 'value': 100000}},
+        'order_queue': queue.SimpleQueue(),
+        'order_results': {},
+        'order_expiry': deque(),
+        'tick_count': 0
+    }
+
+    for tick in range(ORDER_RESULT_TICKS + 1):
+        config['tick_count'] = tick
+        order = {'userId': 'user1', 'stock': 'AAPL', 'quantity': 1, 'type': 'buy'}
+        config['order_results'][str(tick)] = {**order, 'status': 'pending'}
+        config['order_queue'].put((str(tick), order))
+        clear_order_queue(config)
+
+    assert config['stocks']['AAPL'] == 100.0
+    assert config['users']['user1']['assets']['AAPL'] == ORDER_RESULT_TICKS + 1
+    assert config['order_results'][str(ORDER_RESULT_TICKS)]['status'] == 'filled'
+    assert '0' not in config['order_results']
+    assert len(config['order_results']) == ORDER_RESULT_TICKS
+
+def test_view(client):
+    response = client.get('/host/init-server')
+    exchange_id = json.loads(response.data)['exchange_id']
+
+    client.post(f'/host/{exchange_id}/start-server', json={
+        'stocks': ['AAPL', 'GOOG'],
+        'difficulty': 3
+    })
+
+    client.post(f'/client/{exchange_id}/connect', json={'name': 'user1'})
+    client.post(f'/client/{exchange_id}/connect', json={'name': 'user2'})
+
+    client.post(f'/client/{exchange_id}/order', json={
+        'userId': 'user1',
+        'stock': 'AAPL',
+        'quantity': 5,
+        'type': 'buy'
+    })
+
+    response = client.get(f'/client/{exchange_id}/view/user1')
+    assert response.status_code == 200
+    view = response.json
+    assert view['account']['assets'] == {'AAPL': 5}
+    assert set(view['prices']) == {'AAPL', 'GOOG'}
+    assert 'user2' not in response.get_data(as_text=True)
+
+    response = client.get(f'/client/{exchange_id}/view/user3')
+    assert response.status_code == 400
+    assert response.json['message'] == 'User not found.'
+
 def test_trade_request(client):
     response = client.get('/host/init-server')
     exchange_id = json.loads(response.data)['exchange_id']
@@ -248,5 +450,118 @@ def test_get_users(client):
     assert 'user1' in users
     assert 'user2' in users
 
+def test_price_board(client):
+    response = client.get('/host/init-server')
+    exchange_id = json.loads(response.data)['exchange_id']
+
+    client.post(f'/host/{exchange_id}/start-server', json={
+        'stocks': ['AAPL', 'GOOG'],
+        'difficulty': 3
+    })
+
+    reader = PriceBoardReader(exchange_id)
+    tick, prices = reader.read()
+    assert set(prices) == {'AAPL', 'GOOG'}
+    assert tick >= 0
+
+    worker = price_worker_app.test_client()
+    response = worker.get(f'/host/{exchange_id}/prices')
+    assert response.status_code == 200
+    assert set(response.json['prices']) == {'AAPL', 'GOOG'}
+
+    response = worker.get('/host/MISSING/prices')
+    assert response.status_code == 400
+
+    board = PriceBoard('BOARDTEST', ['AAPL'])
+    board.publish({'AAPL': 101.5}, 3)
+    assert PriceBoardReader('BOARDTEST').read() == (3, {'AAPL': 101.5})
+    board.close()
+    assert worker.get('/host/BOARDTEST/prices').status_code == 400
+
+def test_price_board_reader_process():
+    board = PriceBoard('READERTEST', ['AAPL'])
+    board.publish({'AAPL': 99.0}, 1)
+    other_board = PriceBoard('READERTEST2', ['GOOG'])
+    other_board.publish({'GOOG': 50.0}, 2)
+
+    # a reader in its own process starts its own resource tracker on the first attach, which must not
+    # unlink any board it attached to, first or later, when it exits
+    script = '; '.join([
+        'from price_board import PriceBoardReader',
+        'print(PriceBoardReader("READERTEST").read())',
+        'print(PriceBoardReader("READERTEST2").read())',
+        'print(PriceBoardReader("READERTEST").read())'
+    ])
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    assert result.stdout.split('\n')[:3] == ["(1, {'AAPL': 99.0})", "(2, {'GOOG': 50.0})", "(1, {'AAPL': 99.0})"]
+    assert 'leaked' not in result.stderr
+    # the tracker cleans up shortly after its process exits, give it the chance to
+    time.sleep(1)
+    assert PriceBoardReader('READERTEST').read() == (1, {'AAPL': 99.0})
+    assert PriceBoardReader('READERTEST2').read() == (2, {'GOOG': 50.0})
+    other_board.close()
+
+    # a writer that died mid-update leaves the sequence odd, readers give up instead of spinning
+    board.header[SEQ] += 1
+    with pytest.raises(TimeoutError):
+        PriceBoardReader('READERTEST').read()
+    board.close()
+
+def test_profiling(client, monkeypatch):
+    monkeypatch.setattr('namespaces.admin.ADMIN_TOKEN', 'secret')
+    headers = {'X-Admin-Token': 'secret'}
+
+    response = client.get('/host/init-server')
+    exchange_id = json.loads(response.data)['exchange_id']
+
+    client.post(f'/host/{exchange_id}/start-server', json={
+        'stocks': ['AAPL', 'GOOG'],
+        'difficulty': 3
+    })
+
+    response = client.post('/admin/profile', json={'exchange_id': exchange_id, 'mode': 'cprofile', 'seconds': 1})
+    assert response.status_code == 403
+
+    response = client.post('/admin/profile', headers=headers, json={'route': '/nowhere', 'mode': 'cprofile', 'seconds': 1})
+    assert response.status_code == 400
+
+    tick_session = client.post('/admin/profile', headers=headers, json={
+        'exchange_id': exchange_id,
+        'mode': 'cprofile',
+        'seconds': 1.5
+    }).json['session_id']
+    route_session = client.post('/admin/profile', headers=headers, json={
+        'route': '/host/<string:exchange_id>/market-data',
+        'mode': 'sampling',
+        'seconds': 1.5
+    }).json['session_id']
+
+    response = client.get(f'/admin/profile/{tick_session}', headers=headers)
+    assert response.status_code == 400
+    assert response.json['message'] == 'Profiling session still running.'
+
+    client.get(f'/host/{exchange_id}/market-data')
+    time.sleep(2)
+
+    response = client.get(f'/admin/profile/{tick_session}', headers=headers)
+    assert response.status_code == 200
+    stats = marshal.loads(response.data)
+    assert any(function == 'publish_prices' for _, _, function in stats)
+
+    response = client.get(f'/admin/profile/{route_session}', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+    response = client.get(f'/admin/profile/{tick_session}', headers=headers)
+    assert response.status_code == 400
+    assert response.json['message'] == 'Profiling session not found.'
+
+    response = client.get('/admin/slow-log', headers={'X-Admin-Token': 'secreT'})
+    assert response.status_code == 403
+
+    response = client.get('/admin/slow-log', headers=headers)
+    assert response.status_code == 200
+    assert isinstance(response.json['entries'], list)
+
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file